@@ -4,9 +4,10 @@
 import os
 import sys
 import logging
-from typing import Optional
-from dataclasses import dataclass
-from dotenv import load_dotenv, find_dotenv
+import functools
+from types import MappingProxyType
+from typing import Optional, Mapping
+from dotenv import dotenv_values, find_dotenv
 
 
 class ConfigurationError(Exception):
@@ -14,67 +15,151 @@ class ConfigurationError(Exception):
     pass
 
 
-@dataclass
+@functools.lru_cache(maxsize=1)
+def _load_env() -> Mapping[str, str]:
+    """Parse the .env file once and merge it with the process environment.
+
+    Values already set in the process environment take precedence over the
+    .env file, matching load_dotenv's default behaviour.
+
+    Returns:
+        Read-only mapping of environment variable names to values.
+    """
+    env = {key: value for key, value in dotenv_values(find_dotenv()).items() if value is not None}
+    env.update(os.environ)
+    return MappingProxyType(env)
+
+
 class Config:
-    """Application configuration."""
-    slack_token: str
-    channel_name: str
-    private_channel_name: str
-    pairs_are_public: bool
-    chan_names_are_ids: bool
-    lookback_days: int
-    magical_text: str
+    """Application configuration.
+
+    Values are read from an environment mapping and validated on first access,
+    so callers only pay for (and fail on) the fields they actually use.
+    """
+
+    _FIELDS = (
+        'slack_token',
+        'channel_name',
+        'private_channel_name',
+        'pairs_are_public',
+        'chan_names_are_ids',
+        'lookback_days',
+        'magical_text',
+    )
+
+    def __init__(self, *args, env: Optional[Mapping[str, str]] = None, **values):
+        """Initialize configuration.
+
+        Args:
+            *args: Field values given positionally, in the order of the former dataclass fields.
+            env: Mapping of environment variable names to raw values.
+            **values: Field values given directly, e.g. Config(slack_token=..., channel_name=...).
+                These take precedence over env and are used as is.
+
+        Raises:
+            TypeError: If too many positional values are given or a field is given twice.
+            ConfigurationError: If an unknown field is given.
+        """
+        if len(args) > len(self._FIELDS):
+            raise TypeError(f"Config takes at most {len(self._FIELDS)} positional values, got {len(args)}")
+        for field, value in zip(self._FIELDS, args):
+            if field in values:
+                raise TypeError(f"Config got multiple values for {field}")
+            values[field] = value
+
+        unknown = set(values) - set(self._FIELDS)
+        if unknown:
+            raise ConfigurationError(f"Unknown configuration fields: {sorted(unknown)}")
+
+        self._env = env if env is not None else {}
+        # Pre-populate the cached properties so they skip reading the env
+        self.__dict__.update(values)
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self._FIELDS)
+
+    def __repr__(self) -> str:
+        # Only fields read so far, so repr never validates the environment
+        fields = ', '.join(
+            f"{field}={self.__dict__[field]!r}" for field in self._FIELDS if field in self.__dict__
+        )
+        return f"{self.__class__.__name__}({fields})"
 
     @classmethod
+    @functools.lru_cache(maxsize=1)
     def from_env(cls) -> 'Config':
-        """Load and validate configuration from environment variables.
+        """Load configuration from environment variables and the .env file.
+
+        The instance is shared by all callers in the process, so each field is
+        validated at most once.
 
         Returns:
-            Config: Validated configuration object.
+            Config: Configuration object, validated lazily on field access.
+        """
+        logging.info("Configuration loaded from environment")
+        return cls(env=_load_env())
+
+    def validate(self) -> 'Config':
+        """Read every field so invalid configuration fails before any side effects.
+
+        Returns:
+            Config: This configuration object.
 
         Raises:
             ConfigurationError: If required configuration is missing or invalid.
         """
-        # Load .env file
-        load_dotenv(find_dotenv())
-
-        # Required variables
-        slack_token = os.getenv('SLACK_API_TOKEN')
-        if not slack_token:
-            raise ConfigurationError("SLACK_API_TOKEN environment variable is required")
+        for field in self._FIELDS:
+            getattr(self, field)
+        return self
 
-        channel_name = os.getenv('CHANNEL_NAME')
-        if not channel_name:
-            raise ConfigurationError("CHANNEL_NAME environment variable is required")
-
-        lookback_days_str = os.getenv('LOOKBACK_DAYS')
-        if not lookback_days_str:
-            raise ConfigurationError("LOOKBACK_DAYS environment variable is required")
+    def _required(self, name: str) -> str:
+        """Get a required variable.
 
+        Raises:
+            ConfigurationError: If the variable is missing or empty.
+        """
+        value = self._env.get(name)
+        if not value:
+            raise ConfigurationError(f"{name} environment variable is required")
+        return value
+
+    def _flag(self, name: str) -> bool:
+        """Get an optional boolean variable, False by default."""
+        return self._env.get(name, 'False').lower() in ('true', 't', 'yes', 'y', '1')
+
+    @functools.cached_property
+    def slack_token(self) -> str:
+        return self._required('SLACK_API_TOKEN')
+
+    @functools.cached_property
+    def channel_name(self) -> str:
+        return self._required('CHANNEL_NAME')
+
+    @functools.cached_property
+    def private_channel_name(self) -> str:
+        return self._env.get('PRIVATE_CHANNEL_NAME_FOR_MEMORY', 'randomcoffebotprivatechannelformemory')
+
+    @functools.cached_property
+    def pairs_are_public(self) -> bool:
+        return self._flag('PAIRS_ARE_PUBLIC')
+
+    @functools.cached_property
+    def chan_names_are_ids(self) -> bool:
+        return self._flag('CHAN_NAMES_ARE_IDS')
+
+    @functools.cached_property
+    def lookback_days(self) -> int:
+        lookback_days_str = self._required('LOOKBACK_DAYS')
         try:
             lookback_days = int(lookback_days_str)
             if lookback_days < 1:
                 raise ValueError("LOOKBACK_DAYS must be positive")
         except ValueError as e:
             raise ConfigurationError(f"LOOKBACK_DAYS must be a positive integer: {e}")
+        return lookback_days
 
-        magical_text = os.getenv('MAGICAL_TEXT')
-        if not magical_text:
-            raise ConfigurationError("MAGICAL_TEXT environment variable is required")
-
-        # Optional variables with defaults
-        private_channel_name = os.getenv('PRIVATE_CHANNEL_NAME_FOR_MEMORY', 'randomcoffebotprivatechannelformemory')
-        pairs_are_public = os.getenv("PAIRS_ARE_PUBLIC", 'False').lower() in ('true', 't', 'yes', 'y', '1')
-        chan_names_are_ids = os.getenv("CHAN_NAMES_ARE_IDS", 'False').lower() in ('true', 't', 'yes', 'y', '1')
-
-        logging.info(f"Configuration loaded: channel={channel_name}, lookback_days={lookback_days}")
-
-        return cls(
-            slack_token=slack_token,
-            channel_name=channel_name,
-            private_channel_name=private_channel_name,
-            pairs_are_public=pairs_are_public,
-            chan_names_are_ids=chan_names_are_ids,
-            lookback_days=lookback_days,
-            magical_text=magical_text
-        )
+    @functools.cached_property
+    def magical_text(self) -> str:
+        return self._required('MAGICAL_TEXT')
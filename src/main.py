@@ -4,12 +4,14 @@
 import sys
 import logging
 import datetime
-from typing import Optional
+from collections import Counter
+from typing import Optional, List, Dict, Tuple
 
 from config import Config, ConfigurationError
-from slack_client import SlackClient, SlackClientError
+from slack_client import SlackClient, SlackClientError, ChannelNotFoundError, CACHE_PATH
 from pairing import (
-    parse_previous_pairs_from_metadata,
+    iter_previous_pairs_from_metadata,
+    count_previous_matches,
     generate_pairs,
     format_pairs_message,
     pairs_to_metadata,
@@ -18,11 +20,74 @@ from pairing import (
 )
 
 
-def run_random_coffee(config: Optional[Config] = None) -> None:
+def _read_members_and_history(
+    slack_client: SlackClient,
+    channel_id: str,
+    memory_channel_id: str,
+    bot_user_id: str,
+    lookback_days: int
+) -> Tuple[List[str], Dict[str, Counter]]:
+    """Get channel members and count their previous matches from history.
+
+    Args:
+        slack_client: SlackClient instance.
+        channel_id: ID of the channel whose members are paired.
+        memory_channel_id: ID of the channel holding pair history.
+        bot_user_id: Bot user ID, only its messages hold pair history.
+        lookback_days: Number of days of history to consider.
+
+    Returns:
+        Tuple of member IDs (empty if none) and previous match counts.
+
+    Raises:
+        SlackClientError: If Slack API operations fail.
+    """
+    # Get channel members
+    try:
+        members = slack_client.get_members_list(channel_id)
+        logging.info(f"Found {len(members)} members in channel")
+    except SlackClientError as e:
+        logging.error(f"Failed to get channel members: {e}")
+        raise
+
+    if not members:
+        return members, {}
+
+    # Get conversation history to find previous pairs
+    try:
+        oldest_timestamp = (
+            datetime.datetime.today() - datetime.timedelta(days=lookback_days)
+        ).timestamp()
+        newest_timestamp = datetime.datetime.now().timestamp()
+
+        # Stream messages straight into the match counts, pages are fetched lazily
+        messages = slack_client.iter_bot_messages(
+            channel_id=memory_channel_id,
+            oldest_timestamp=oldest_timestamp,
+            newest_timestamp=newest_timestamp,
+            bot_user_id=bot_user_id,
+            max_messages=len(members) - 2
+        )
+
+        previous_matches = count_previous_matches(iter_previous_pairs_from_metadata(messages))
+        if previous_matches:
+            logging.info(f"Found previous matches for {len(previous_matches)} members")
+        else:
+            logging.info("No previous pairs found in history")
+
+    except SlackClientError as e:
+        logging.error(f"Failed to get conversation history: {e}")
+        raise
+
+    return members, previous_matches
+
+
+def run_random_coffee(config: Optional[Config] = None, cache_path: Optional[str] = CACHE_PATH) -> None:
     """Execute random coffee pairing and notifications.
 
     Args:
         config: Configuration object. If None, loads from environment.
+        cache_path: JSON file caching channel IDs and bot user ID. None disables it.
 
     Raises:
         ConfigurationError: If configuration is invalid.
@@ -33,6 +98,9 @@ def run_random_coffee(config: Optional[Config] = None) -> None:
     if config is None:
         config = Config.from_env()
 
+    # Fail on invalid configuration before any Slack call or DM is sent
+    config.validate()
+
     # Use the configured channel
     channel = config.channel_name
     logging.info(f"Using channel: {channel}")
@@ -47,20 +115,13 @@ def run_random_coffee(config: Optional[Config] = None) -> None:
 
     # Initialize Slack client
     try:
-        slack_client = SlackClient(config.slack_token)
+        slack_client = SlackClient(config.slack_token, cache_path=cache_path)
     except SlackClientError as e:
         logging.error(f"Failed to initialize Slack client: {e}")
         raise
 
-    # Resolve channel IDs
-    try:
-        channel_ids = slack_client.get_channels_id(channels_to_resolve, config.chan_names_are_ids)
-        channel_id = channel_ids[channel]
-        memory_channel_id = channel_ids[memory_channel]
-        logging.info(f"Resolved channel IDs: {channel_ids}")
-    except SlackClientError as e:
-        logging.error(f"Failed to resolve channel IDs: {e}")
-        raise
+    # Fetch independent first pages concurrently, later calls reuse them
+    slack_client.warmup(channels_to_resolve, config.chan_names_are_ids, channel)
 
     # Get bot user ID
     try:
@@ -69,46 +130,36 @@ def run_random_coffee(config: Optional[Config] = None) -> None:
         logging.error(f"Failed to get bot user ID: {e}")
         raise
 
-    # Get channel members
-    try:
-        members = slack_client.get_members_list(channel_id)
-        logging.info(f"Found {len(members)} members in channel")
-    except SlackClientError as e:
-        logging.error(f"Failed to get channel members: {e}")
-        raise
+    # Channel IDs served from the disk cache can be stale (e.g. the channel was
+    # recreated), so if Slack doesn't know them they are resolved once more
+    for attempt in (1, 2):
+        # Resolve channel IDs
+        try:
+            channel_ids = slack_client.get_channels_id(channels_to_resolve, config.chan_names_are_ids)
+            channel_id = channel_ids[channel]
+            memory_channel_id = channel_ids[memory_channel]
+            logging.info(f"Resolved channel IDs: {channel_ids}")
+        except SlackClientError as e:
+            logging.error(f"Failed to resolve channel IDs: {e}")
+            raise
+
+        try:
+            members, previous_matches = _read_members_and_history(
+                slack_client, channel_id, memory_channel_id, bot_user_id, config.lookback_days
+            )
+            break
+        except ChannelNotFoundError as e:
+            if attempt == 2 or not slack_client.forget_cached_channels(channels_to_resolve):
+                raise
+            logging.warning(f"Cached channel IDs are stale, resolving again: {e}")
 
     if not members:
         logging.warning("No members found in channel, nothing to do")
         return
 
-    # Get conversation history to find previous pairs
-    try:
-        oldest_timestamp = (
-            datetime.datetime.today() - datetime.timedelta(days=config.lookback_days)
-        ).timestamp()
-        newest_timestamp = datetime.datetime.now().timestamp()
-
-        messages = slack_client.get_conversation_history(
-            channel_id=memory_channel_id,
-            oldest_timestamp=oldest_timestamp,
-            newest_timestamp=newest_timestamp,
-            bot_user_id=bot_user_id,
-            max_messages=len(members) - 2
-        )
-
-        previous_pairs = parse_previous_pairs_from_metadata(messages)
-        if previous_pairs:
-            logging.info(f"Found {len(previous_pairs)} previous pairing rounds")
-        else:
-            logging.info("No previous pairs found in history")
-
-    except SlackClientError as e:
-        logging.error(f"Failed to get conversation history: {e}")
-        raise
-
     # Generate pairs
     try:
-        pairs = generate_pairs(members, previous_pairs)
+        pairs = generate_pairs(members, previous_matches=previous_matches)
         logging.info(f"Generated {len(pairs)} pairs")
     except PairingError as e:
         logging.error(f"Failed to generate pairs: {e}")
@@ -1,11 +1,14 @@
 #!/usr/bin/env python
 """Pairing logic and history management for random coffee matches."""
 
+import sys
 import random
 import logging
 import datetime
-import json
-from typing import List, Tuple, Dict, Optional, Set
+from collections import Counter, defaultdict
+from typing import List, Tuple, Dict, Optional, Iterable, Iterator, Set
+
+import networkx as nx
 
 
 PairList = List[Tuple[str, str]]
@@ -17,17 +20,20 @@ class PairingError(Exception):
     pass
 
 
-def parse_previous_pairs_from_metadata(messages: List[Dict]) -> Optional[PairHistory]:
-    """Extract previous pairs from message metadata.
+# Above this many members the O(n^3) optimal matching gets too slow (~0.4s at 100
+# members, ~10s at 300), so pairs are picked greedily instead
+MATCHING_MAX_MEMBERS = 100
+
+
+def iter_previous_pairs_from_metadata(messages: Iterable[Dict]) -> Iterator[PairList]:
+    """Lazily extract previous pairs from message metadata.
 
     Args:
-        messages: List of message dictionaries from Slack API.
+        messages: Iterable of message dictionaries from Slack API.
 
-    Returns:
-        List of pair lists, or None if no pairs found.
+    Yields:
+        One pair list per random coffee message.
     """
-    previous_pairs = []
-
     for message in messages:
         metadata = message.get('metadata')
         if not metadata:
@@ -40,10 +46,22 @@ def parse_previous_pairs_from_metadata(messages: List[Dict]) -> Optional[PairHis
         event_payload = metadata.get('event_payload', {})
         pairs_data = event_payload.get('pairs', [])
 
-        # Convert from list of dicts to list of tuples
+        # Convert from list of dicts to list of tuples, interning the user IDs
+        # as they repeat across rounds and are compared and hashed a lot
         if pairs_data:
-            pair_list = [(pair['user1'], pair['user2']) for pair in pairs_data]
-            previous_pairs.append(pair_list)
+            yield [(sys.intern(pair['user1']), sys.intern(pair['user2'])) for pair in pairs_data]
+
+
+def parse_previous_pairs_from_metadata(messages: Iterable[Dict]) -> Optional[PairHistory]:
+    """Extract previous pairs from message metadata.
+
+    Args:
+        messages: Iterable of message dictionaries from Slack API.
+
+    Returns:
+        List of pair lists, or None if no pairs found.
+    """
+    previous_pairs = list(iter_previous_pairs_from_metadata(messages))
 
     if not previous_pairs:
         return None
@@ -52,36 +70,136 @@ def parse_previous_pairs_from_metadata(messages: List[Dict]) -> Optional[PairHis
     return previous_pairs
 
 
-def build_previous_matches_dict(members: List[str], previous_pairs: Optional[PairHistory]) -> Dict[str, Set[str]]:
-    """Build a dictionary of previous matches for each member.
+def count_previous_matches(previous_pairs: Optional[Iterable[PairList]]) -> Dict[str, Counter]:
+    """Count how many times each member was matched with each other member.
 
     Args:
-        members: List of member identifiers.
-        previous_pairs: Historical pair data.
+        previous_pairs: Historical pair data, consumed in a single pass.
 
     Returns:
-        Dictionary mapping each member to set of previous matches.
+        Dictionary mapping each member to a Counter of their previous matches.
     """
-    members_previous_matches: Dict[str, Set[str]] = {member: set() for member in members}
+    repeat_counts: Dict[str, Counter] = defaultdict(Counter)
 
     if not previous_pairs:
-        return members_previous_matches
+        return repeat_counts
+
+    for pair_set in previous_pairs:
+        for p1, p2 in pair_set:
+            repeat_counts[p1][p2] += 1
+            if p1 != p2:
+                repeat_counts[p2][p1] += 1
+
+    return repeat_counts
 
-    for member in members:
-        for pair_set in previous_pairs:
-            for p1, p2 in pair_set:
-                if p1 == member:
-                    members_previous_matches[member].add(p2)
-                elif p2 == member:
-                    members_previous_matches[member].add(p1)
 
-    return members_previous_matches
+def generate_pairs(
+    members: List[str],
+    previous_pairs: Optional[Iterable[PairList]] = None,
+    previous_matches: Optional[Dict[str, Counter]] = None
+) -> PairList:
+    """Generate random pairs from members, minimizing repeats of recent matches.
+
+    Up to MATCHING_MAX_MEMBERS members form a complete graph weighted by how
+    often each two were paired recently, and a minimum weight perfect matching
+    picks the pairs. Random jitter on the weights breaks ties between equally
+    good pairings. Larger channels are paired greedily, preferring members who
+    weren't matched recently.
+
+    If there's an odd number of members, one member will be matched twice.
+
+    Args:
+        members: List of member identifiers.
+        previous_pairs: Historical pair data to avoid repeating.
+        previous_matches: Result of count_previous_matches, used instead of previous_pairs.
+
+    Returns:
+        List of tuples representing pairs.
+
+    Raises:
+        PairingError: If pairing fails.
+    """
+    if not members:
+        return []
+
+    if len(members) == 1:
+        # A single member pairs with one-self
+        return [(members[0], members[0])]
+
+    if previous_matches is None:
+        previous_matches = count_previous_matches(previous_pairs)
+
+    if len(members) > MATCHING_MAX_MEMBERS:
+        pairs = _generate_pairs_greedy(members, previous_matches)
+    else:
+        pairs = _generate_pairs_matching(members, previous_matches)
+
+    logging.info(f"Generated {len(pairs)} pairs")
+    return pairs
+
+
+def _generate_pairs_matching(members: List[str], previous_matches: Dict[str, Counter]) -> PairList:
+    """Pair members with a minimum weight matching over repeat counts.
+
+    Args:
+        members: List of at least two member identifiers.
+        previous_matches: Result of count_previous_matches.
+
+    Returns:
+        List of tuples representing pairs, the member matched twice last.
+
+    Raises:
+        PairingError: If the matching doesn't cover every member.
+    """
+    # Random permutation in one pass, also picks who is cloned in the odd case
+    nodes: List = random.sample(members, len(members))
+
+    # Odd case: clone one member so they get a second match
+    if len(nodes) % 2:
+        nodes.append((nodes[0],))
+
+    def member_of(node) -> str:
+        return node[0] if isinstance(node, tuple) else node
+
+    node_members = [member_of(node) for node in nodes]
+    no_matches: Counter = Counter()
+
+    # Jitter stays below one repeat in total, so fewer repeats always wins
+    repeat_weight = len(nodes)
+    graph = nx.Graph()
+    for i, node1 in enumerate(nodes):
+        member1 = node_members[i]
+        member1_counts = previous_matches.get(member1, no_matches)
+        for node2, member2 in zip(nodes[i + 1:], node_members[i + 1:]):
+            if member1 == member2:
+                continue
+            weight = member1_counts[member2] * repeat_weight + random.random()
+            graph.add_edge(node1, node2, weight=weight)
+
+    matching = nx.min_weight_matching(graph)
+    if len(matching) * 2 != len(nodes):
+        raise PairingError(f"Could not pair all {len(members)} members")
+
+    pairs = []
+    odd_pair = None
+    for node1, node2 in matching:
+        if isinstance(node2, tuple):
+            node1, node2 = node2, node1
+        if isinstance(node1, tuple):
+            # Keep the member matched twice last, as the message footer explains
+            odd_pair = (member_of(node1), node2)
+        else:
+            pairs.append((node1, node2))
+    if odd_pair:
+        pairs.append(odd_pair)
+
+    return pairs
 
 
 def find_best_match(
     member1: str,
-    available_members: List[str],
-    members_previous_matches: Dict[str, Set[str]]
+    available_members: Set[str],
+    members_previous_matches: Dict[str, Counter]
 ) -> str:
     """Find the best match for member1 from available members.
 
@@ -89,8 +207,8 @@ def find_best_match(
 
     Args:
         member1: Member to match.
-        available_members: List of available members to match with.
-        members_previous_matches: Dictionary of previous matches.
+        available_members: Set of available members to match with.
+        members_previous_matches: Result of count_previous_matches.
 
     Returns:
         The chosen match.
@@ -102,60 +220,44 @@ def find_best_match(
         raise PairingError(f"No available members to match with {member1}")
 
     # Try to find someone who hasn't been matched before
-    new_candidates = [
-        member for member in available_members
-        if member not in members_previous_matches[member1]
-    ]
+    new_candidates = available_members.difference(members_previous_matches.get(member1, ()))
 
     if new_candidates:
-        return random.choice(new_candidates)
+        return random.choice(tuple(new_candidates))
     else:
         # All available members have been matched before, pick randomly
-        return random.choice(available_members)
+        return random.choice(tuple(available_members))
 
 
-def generate_pairs(members: List[str], previous_pairs: Optional[PairHistory] = None) -> PairList:
-    """Generate random pairs from members, avoiding recent matches.
-
-    If there's an odd number of members, one member will be matched twice.
+def _generate_pairs_greedy(members: List[str], previous_matches: Dict[str, Counter]) -> PairList:
+    """Pair members greedily in random order, avoiding recent matches.
 
     Args:
-        members: List of member identifiers.
-        previous_pairs: Historical pair data to avoid repeating.
+        members: List of at least two member identifiers.
+        previous_matches: Result of count_previous_matches.
 
     Returns:
-        List of tuples representing pairs.
-
-    Raises:
-        PairingError: If pairing fails.
+        List of tuples representing pairs, the member matched twice last.
     """
-    if not members:
-        return []
-
-    # Make a copy to avoid modifying the original
-    available = members.copy()
-    random.shuffle(available)
+    available = set(members)
+    pairs = []
+    first_member = None
 
-    # Build previous matches lookup
-    members_previous_matches = build_previous_matches_dict(members, previous_pairs)
+    for member1 in random.sample(members, len(members)):
+        if member1 not in available:
+            continue
+        available.discard(member1)
+        if first_member is None:
+            first_member = member1  # Remember first member for odd case
 
-    pairs = []
-    first_member = available[-1]  # Remember first member for odd case
-
-    while available:
-        if len(available) >= 2:
-            # Normal case: pair two available members
-            member1 = available.pop()
-            member2 = find_best_match(member1, available, members_previous_matches)
-            available.remove(member2)
+        if available:
+            member2 = find_best_match(member1, available, previous_matches)
+            available.discard(member2)
             pairs.append((member1, member2))
         else:
-            # Odd case: pair last member with first member
-            member2 = find_best_match(first_member, available, members_previous_matches)
-            available.remove(member2)
-            pairs.append((first_member, member2))
+            # Odd case: pair the last member with the first member
+            pairs.append((first_member, member1))
 
-    logging.info(f"Generated {len(pairs)} pairs")
     return pairs
 
 
@@ -178,14 +280,14 @@ def format_pairs_message(
         return ""
 
     header = f"{magical_text}:\n"
-    pair_lines = [f" {i+1}. <@{p1}> and <@{p2}>\n" for i, (p1, p2) in enumerate(pairs)]
+    body = ''.join(f" {i}. <@{p1}> and <@{p2}>\n" for i, (p1, p2) in enumerate(pairs, 1))
     footer = (
         f"An uneven number of members results in one person getting two coffee matches. "
         f"Matches from the last {lookback_days} days considered to avoid matching the "
         f"same members several times in the time period."
     )
 
-    return header + ''.join(pair_lines) + footer
+    return header + body + footer
 
 
 def pairs_to_metadata(pairs: PairList) -> Dict:
@@ -212,7 +314,7 @@ def send_pair_notifications(
     channel_id: str,
     slack_client
 ) -> None:
-    """Send group DMs to all pairs.
+    """Send group DMs to all pairs concurrently.
 
     Args:
         pairs: List of member pairs.
@@ -222,20 +324,24 @@ def send_pair_notifications(
     Raises:
         PairingError: If notifications fail.
     """
+    dms = [
+        (
+            pair,
+            f"Hello <@{pair[0]}> and <@{pair[1]}>\n"
+            f"You've been randomly selected for <#{channel_id}>!\n"
+            f"Take some time to meet soon."
+        )
+        for pair in pairs
+    ]
+
     success_count = 0
     fail_count = 0
 
-    for pair in pairs:
-        try:
-            message = (
-                f"Hello <@{pair[0]}> and <@{pair[1]}>\n"
-                f"You've been randomly selected for <#{channel_id}>!\n"
-                f"Take some time to meet soon."
-            )
-            slack_client.send_group_dm(pair, message)
+    for pair, error in zip(pairs, slack_client.send_group_dms(dms)):
+        if error is None:
             success_count += 1
-        except Exception as e:
-            logging.error(f"Failed to send DM to {pair}: {e}")
+        else:
+            logging.error(f"Failed to send DM to {pair}: {error}")
             fail_count += 1
 
     logging.info(f"Sent {success_count} group DMs, {fail_count} failed")
@@ -1,11 +1,19 @@
 #!/usr/bin/env python
 """Slack API client wrapper with improved error handling."""
 
-import time
+import os
 import json
+import asyncio
+import hashlib
 import logging
-from typing import Optional, List, Dict, Tuple
+from typing import Optional, List, Dict, Tuple, Iterator, FrozenSet, Set, Callable
 from slack_sdk import WebClient
+from slack_sdk.web.async_client import AsyncWebClient
+from slack_sdk.http_retry.builtin_handlers import ConnectionErrorRetryHandler, RateLimitErrorRetryHandler
+from slack_sdk.http_retry.builtin_async_handlers import (
+    AsyncConnectionErrorRetryHandler,
+    AsyncRateLimitErrorRetryHandler
+)
 from slack_sdk.errors import SlackApiError
 
 
@@ -14,21 +22,34 @@ class SlackClientError(Exception):
     pass
 
 
-# Rate limiting delays (in seconds)
-CHANNEL_LIST_DELAY = 10
-HISTORY_PAGE_DELAY = 1
-MEMBERS_PAGE_DELAY = 5
-MPIM_DELAY = 1
+class ChannelNotFoundError(SlackClientError):
+    """Raised when Slack doesn't know a channel ID or the bot can't access it."""
+    pass
+
+
+# Slack errors meaning a channel ID is unknown or no longer accessible
+CHANNEL_NOT_FOUND_ERRORS = ('channel_not_found', 'not_in_channel')
+
+
+# Retries on HTTP 429, waiting for Slack's Retry-After header
+RATE_LIMIT_MAX_RETRIES = 5
+
+# Maximum number of group DMs sent concurrently
+GROUP_DM_CONCURRENCY = 20
+
+# Disk cache for channel IDs and bot user ID, which don't change between runs
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'pyslackrandomcoffee.json')
 
 
 class SlackClient:
     """Wrapper around Slack WebClient with retry logic and error handling."""
 
-    def __init__(self, token: str):
+    def __init__(self, token: str, cache_path: Optional[str] = CACHE_PATH):
         """Initialize Slack client.
 
         Args:
             token: Slack API token.
+            cache_path: JSON file caching channel IDs and bot user ID. None disables it.
 
         Raises:
             SlackClientError: If token is invalid or connection fails.
@@ -36,11 +57,179 @@ class SlackClient:
         if not token:
             raise SlackClientError("Slack token cannot be empty")
 
-        self.client = WebClient(token=token)
+        self.client = WebClient(
+            token=token,
+            retry_handlers=[
+                RateLimitErrorRetryHandler(max_retry_count=RATE_LIMIT_MAX_RETRIES),
+                ConnectionErrorRetryHandler()
+            ]
+        )
+        self.aclient = AsyncWebClient(
+            token=token,
+            retry_handlers=[
+                AsyncRateLimitErrorRetryHandler(max_retry_count=RATE_LIMIT_MAX_RETRIES),
+                AsyncConnectionErrorRetryHandler()
+            ]
+        )
+        self._cache_path = cache_path
+        self._cache_key = hashlib.sha256(token.encode()).hexdigest()
         self._bot_user_id: Optional[str] = None
+        self._user_is_bot: Optional[Dict[str, bool]] = None
+        self._chan_cache: Dict[FrozenSet[str], Dict[str, str]] = {}
+        # Channel names whose IDs were served from the disk cache
+        self._disk_cached_channels: Set[str] = set()
+        # First pages fetched by warmup(), keyed by (method, channel ID)
+        self._prefetched: Dict[Tuple[str, Optional[str]], Dict] = {}
+
+    def _load_cache(self) -> Dict:
+        """Load this token's entry from the disk cache.
+
+        Returns:
+            Cached entry, empty if the cache is disabled, missing or unreadable.
+        """
+        if not self._cache_path:
+            return {}
+
+        try:
+            with open(self._cache_path) as f:
+                entry = json.load(f).get(self._cache_key, {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logging.warning(f"Ignoring unreadable cache {self._cache_path}: {e}")
+            return {}
+
+        return entry if isinstance(entry, dict) else {}
+
+    def _update_cache(self, **values) -> None:
+        """Merge values into this token's entry of the disk cache.
+
+        Failures are logged and ignored, the cache is only an optimization.
+
+        Args:
+            **values: Keys to set in the cache entry.
+        """
+        def merge(entry: Dict) -> None:
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    entry.setdefault(key, {}).update(value)
+                else:
+                    entry[key] = value
+
+        self._modify_cache(merge)
+
+    def _modify_cache(self, modify: Callable[[Dict], None]) -> None:
+        """Apply modify to this token's entry of the disk cache and write it back.
+
+        Failures are logged and ignored, the cache is only an optimization.
+
+        Args:
+            modify: Function mutating the cache entry in place.
+        """
+        if not self._cache_path:
+            return
+
+        try:
+            try:
+                with open(self._cache_path) as f:
+                    cache = json.load(f)
+                if not isinstance(cache, dict):
+                    cache = {}
+            except (FileNotFoundError, ValueError):
+                cache = {}
+
+            entry = cache.get(self._cache_key)
+            if not isinstance(entry, dict):
+                entry = cache[self._cache_key] = {}
+            modify(entry)
+
+            os.makedirs(os.path.dirname(self._cache_path), exist_ok=True)
+            tmp_path = f"{self._cache_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(cache, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._cache_path)
+        except OSError as e:
+            logging.warning(f"Could not write cache {self._cache_path}: {e}")
+
+    def forget_cached_channels(self, channels: List[str]) -> bool:
+        """Drop channel IDs that were served from the disk cache.
+
+        Called when Slack reports a cached ID as unknown, e.g. after the channel
+        was recreated, so the next get_channels_id lists channels again.
+
+        Args:
+            channels: Channel names to forget.
+
+        Returns:
+            True if any of the channels came from the disk cache.
+        """
+        stale = self._disk_cached_channels.intersection(channels)
+        if not stale:
+            return False
+
+        def remove(entry: Dict) -> None:
+            cached_channels = entry.get('channels')
+            if isinstance(cached_channels, dict):
+                for chan in stale:
+                    cached_channels.pop(chan, None)
+
+        self._modify_cache(remove)
+        self._disk_cached_channels -= stale
+        self._chan_cache = {key: value for key, value in self._chan_cache.items() if not key & stale}
+        return True
+
+    def warmup(self, channels: List[str], chan_names_are_ids: bool, members_channel: str) -> None:
+        """Concurrently fetch the first page of independent startup requests.
+
+        auth.test, users.list and the first page of conversations.list or
+        conversations.members don't depend on each other. Their responses are
+        kept for the synchronous methods, which then skip those requests.
+        Failures are only logged, the synchronous methods retry them.
+
+        Args:
+            channels: Channel names that get_channels_id will resolve.
+            chan_names_are_ids: If True, channel names are already IDs.
+            members_channel: Channel whose members get_members_list will fetch.
+        """
+        cached = self._load_cache()
+        cached_channels = cached.get('channels', {})
+        if not isinstance(cached_channels, dict):
+            cached_channels = {}
+        members_channel_id = members_channel if chan_names_are_ids else cached_channels.get(members_channel)
+
+        async def fetch_all() -> Dict[Tuple[str, Optional[str]], object]:
+            calls = {}
+            if not self._bot_user_id and not cached.get('bot_user_id'):
+                calls[('auth_test', None)] = self.aclient.auth_test()
+            if not chan_names_are_ids and not all(chan in cached_channels for chan in channels):
+                calls[('conversations_list', None)] = self.aclient.conversations_list(
+                    limit=200,
+                    types='public_channel,private_channel'
+                )
+            if members_channel_id:
+                calls[('conversations_members', members_channel_id)] = self.aclient.conversations_members(
+                    limit=200,
+                    channel=members_channel_id
+                )
+            if self._user_is_bot is None:
+                calls[('users_list', None)] = self.aclient.users_list(limit=1000)
+
+            results = await asyncio.gather(*calls.values(), return_exceptions=True)
+            return dict(zip(calls, results))
+
+        for key, result in asyncio.run(fetch_all()).items():
+            if isinstance(result, Exception):
+                logging.warning(f"Warmup request {key[0]} failed: {result}")
+            elif key[0] == 'auth_test':
+                self._bot_user_id = result["user_id"]
+                self._update_cache(bot_user_id=self._bot_user_id)
+            else:
+                self._prefetched[key] = result
 
     def get_bot_user_id(self) -> str:
-        """Get the bot's user ID.
+        """Get the bot's user ID, cached in memory and on disk.
 
         Returns:
             Bot user ID.
@@ -51,10 +240,16 @@ class SlackClient:
         if self._bot_user_id:
             return self._bot_user_id
 
+        cached = self._load_cache().get('bot_user_id')
+        if cached:
+            self._bot_user_id = cached
+            return self._bot_user_id
+
         try:
             test = self.client.auth_test()
             self._bot_user_id = test["user_id"]
             logging.info(f"Bot user ID: {self._bot_user_id}")
+            self._update_cache(bot_user_id=self._bot_user_id)
             return self._bot_user_id
         except SlackApiError as e:
             raise SlackClientError(f"Failed to get bot user ID: {e}")
@@ -62,6 +257,9 @@ class SlackClient:
     def get_channels_id(self, channels: List[str], chan_names_are_ids: bool) -> Dict[str, str]:
         """Convert channel names to IDs.
 
+        Resolved IDs are cached in memory and on disk, so later calls and runs
+        skip listing channels.
+
         Args:
             channels: List of channel names.
             chan_names_are_ids: If True, treat channel names as IDs.
@@ -75,17 +273,30 @@ class SlackClient:
         if chan_names_are_ids:
             return {chan: chan for chan in channels}
 
+        cache_key = frozenset(channels)
+        if cache_key in self._chan_cache:
+            return dict(self._chan_cache[cache_key])
+
+        cached_channels = self._load_cache().get('channels', {})
+        if isinstance(cached_channels, dict) and all(chan in cached_channels for chan in channels):
+            logging.info("Using cached channel IDs")
+            self._disk_cached_channels.update(channels)
+            self._chan_cache[cache_key] = {chan: cached_channels[chan] for chan in channels}
+            return dict(self._chan_cache[cache_key])
+
         chan_name_to_id = {chan: None for chan in channels}
 
         try:
             has_more = True
             next_cursor = None
             while has_more:
-                response = self.client.conversations_list(
-                    limit=200,
-                    cursor=next_cursor,
-                    types='public_channel,private_channel'
-                )
+                response = None if next_cursor else self._prefetched.pop(('conversations_list', None), None)
+                if response is None:
+                    response = self.client.conversations_list(
+                        limit=200,
+                        cursor=next_cursor,
+                        types='public_channel,private_channel'
+                    )
                 channel_list = response["channels"]
                 logging.info(f"Retrieved {len(channel_list)} channels")
 
@@ -102,18 +313,66 @@ class SlackClient:
                 if has_more:
                     next_cursor = response['response_metadata']['next_cursor']
                     logging.info(f"Currently retrieved: {chan_name_to_id}")
-                    time.sleep(CHANNEL_LIST_DELAY)
 
             # Check if any channels weren't found
             missing = [name for name, id in chan_name_to_id.items() if id is None]
             if missing:
                 raise SlackClientError(f"Could not find channels: {missing}")
 
-            return chan_name_to_id
+            self._update_cache(channels=chan_name_to_id)
+            self._chan_cache[cache_key] = chan_name_to_id
+            return dict(chan_name_to_id)
 
         except SlackApiError as e:
             raise SlackClientError(f"Error getting channel IDs for {channels}: {e}")
 
+    @staticmethod
+    def _channel_error(e: SlackApiError, message: str) -> SlackClientError:
+        """Wrap a Slack error on a channel call, flagging unknown channels.
+
+        Args:
+            e: Error raised by the Slack SDK.
+            message: Error message.
+
+        Returns:
+            ChannelNotFoundError for CHANNEL_NOT_FOUND_ERRORS, SlackClientError otherwise.
+        """
+        if e.response is not None and e.response.get('error') in CHANNEL_NOT_FOUND_ERRORS:
+            return ChannelNotFoundError(message)
+        return SlackClientError(message)
+
+    def _ensure_user_cache(self) -> Dict[str, bool]:
+        """Fetch all workspace users once and cache which ones to exclude.
+
+        Returns:
+            Dictionary mapping user IDs to True for bots and deleted users.
+
+        Raises:
+            SlackApiError: If unable to list users.
+        """
+        if self._user_is_bot is not None:
+            return self._user_is_bot
+
+        user_is_bot = {}
+        has_more = True
+        next_cursor = None
+
+        while has_more:
+            response = None if next_cursor else self._prefetched.pop(('users_list', None), None)
+            if response is None:
+                response = self.client.users_list(limit=1000, cursor=next_cursor)
+            for user in response['members']:
+                user_is_bot[user['id']] = user.get('is_bot', False) or user.get('deleted', False)
+
+            has_more = (response.get('response_metadata') is not None and
+                       response['response_metadata'].get('next_cursor'))
+            if has_more:
+                next_cursor = response['response_metadata']['next_cursor']
+                logging.info(f"Currently retrieved: {len(user_is_bot)} users")
+
+        self._user_is_bot = user_is_bot
+        return user_is_bot
+
     def get_members_list(self, channel_id: str) -> List[str]:
         """Get list of non-bot members in a channel.
 
@@ -133,11 +392,13 @@ class SlackClient:
             next_cursor = None
 
             while has_more:
-                response = self.client.conversations_members(
-                    limit=200,
-                    channel=channel_id,
-                    cursor=next_cursor
-                )
+                response = None if next_cursor else self._prefetched.pop(('conversations_members', channel_id), None)
+                if response is None:
+                    response = self.client.conversations_members(
+                        limit=200,
+                        channel=channel_id,
+                        cursor=next_cursor
+                    )
                 member_ids.extend(response['members'])
 
                 has_more = (response.get('response_metadata') is not None and
@@ -145,89 +406,106 @@ class SlackClient:
                 if has_more:
                     next_cursor = response['response_metadata']['next_cursor']
                     logging.info(f"Currently retrieved: {len(member_ids)} members")
-                    time.sleep(MEMBERS_PAGE_DELAY)
-
-            # Fetch user info and filter bots
-            members = []
-            for member_id in member_ids:
-                try:
-                    user = self.client.users_info(user=member_id)['user']
-                    if not user.get('is_bot', False):
-                        members.append(user['id'])
-                except SlackApiError as e:
-                    logging.warning(f"Could not fetch user info for {member_id}: {e}")
-                    continue
+
+            # Filter bots using the workspace user list
+            user_is_bot = self._ensure_user_cache()
+            members = [member_id for member_id in member_ids if not user_is_bot.get(member_id, False)]
 
             logging.info(f"Found {len(members)} non-bot members")
             return members
 
         except SlackApiError as e:
-            raise SlackClientError(f"Error getting members for channel {channel_id}: {e}")
+            raise self._channel_error(e, f"Error getting members for channel {channel_id}: {e}")
 
-    def get_conversation_history(
+    def iter_bot_messages(
         self,
         channel_id: str,
         oldest_timestamp: float,
         newest_timestamp: float,
         bot_user_id: Optional[str] = None,
         max_messages: Optional[int] = None
-    ) -> List[Dict]:
-        """Fetch conversation history with pagination.
+    ) -> Iterator[Dict]:
+        """Yield conversation history messages one at a time as pages arrive.
 
         Args:
             channel_id: Slack channel ID.
             oldest_timestamp: Unix timestamp for oldest message.
             newest_timestamp: Unix timestamp for newest message.
-            bot_user_id: If provided, only return messages from this user.
-            max_messages: Maximum number of messages to return.
+            bot_user_id: If provided, only yield messages from this user.
+            max_messages: Maximum number of messages to yield. Paging stops once reached.
 
-        Returns:
-            List of message dictionaries.
+        Yields:
+            Message dictionaries.
 
         Raises:
             SlackClientError: If unable to fetch history.
         """
         try:
+            # Stop paging as soon as enough messages are yielded
+            limit_messages = max_messages is not None and max_messages > 0
+
             params = {
                 'channel': channel_id,
-                'limit': 200,
+                # Only shrink pages when unfiltered, filtering would otherwise cost extra pages
+                'limit': min(200, max_messages) if limit_messages and not bot_user_id else 200,
                 'oldest': oldest_timestamp,
                 'newest': newest_timestamp,
                 'include_all_metadata': True
             }
 
-            conversation_history = []
+            count = 0
             has_more = True
             next_cursor = None
 
             while has_more:
                 response = self.client.conversations_history(**params, cursor=next_cursor)
-                conversation_history.extend(response["messages"])
+
+                for msg in response["messages"]:
+                    # Filter by bot user if specified
+                    if bot_user_id and msg.get("user") != bot_user_id:
+                        continue
+                    yield msg
+                    count += 1
+                    if limit_messages and count >= max_messages:
+                        logging.info(f"Retrieved {count} messages")
+                        return
 
                 has_more = response.get('has_more', False)
                 if has_more:
                     next_cursor = response['response_metadata']['next_cursor']
                     logging.info('Fetching next page of conversation history')
-                    time.sleep(HISTORY_PAGE_DELAY)
 
-            logging.info(f"Retrieved {len(conversation_history)} total messages")
+            logging.info(f"Retrieved {count} messages")
+
+        except SlackApiError as e:
+            raise self._channel_error(e, f"Error getting conversation history for {channel_id}: {e}")
 
-            # Filter by bot user if specified
-            if bot_user_id:
-                conversation_history = [
-                    msg for msg in conversation_history
-                    if msg.get("user") == bot_user_id
-                ]
-                logging.info(f"Filtered to {len(conversation_history)} messages from bot")
+    def get_conversation_history(
+        self,
+        channel_id: str,
+        oldest_timestamp: float,
+        newest_timestamp: float,
+        bot_user_id: Optional[str] = None,
+        max_messages: Optional[int] = None
+    ) -> List[Dict]:
+        """Fetch conversation history with pagination.
 
-            # Limit messages if specified
-            if max_messages:
-                conversation_history = conversation_history[:max_messages]
+        Args:
+            channel_id: Slack channel ID.
+            oldest_timestamp: Unix timestamp for oldest message.
+            newest_timestamp: Unix timestamp for newest message.
+            bot_user_id: If provided, only return messages from this user.
+            max_messages: Maximum number of messages to return. Paging stops once reached.
 
-            return conversation_history
+        Returns:
+            List of message dictionaries.
 
-        except SlackApiError as e:
-            raise SlackClientError(f"Error getting conversation history for {channel_id}: {e}")
+        Raises:
+            SlackClientError: If unable to fetch history.
+        """
+        return list(self.iter_bot_messages(
+            channel_id, oldest_timestamp, newest_timestamp, bot_user_id, max_messages
+        ))
 
     def post_message(self, message: str, channel_id: str) -> bool:
         """Send a text message to a channel.
@@ -287,23 +565,48 @@ class SlackClient:
         except SlackApiError as e:
             raise SlackClientError(f"Error posting message with metadata to {channel_id}: {e}")
 
-    def send_group_dm(self, user_ids: Tuple[str, str], message: str) -> bool:
-        """Send a group DM to a pair of users.
+    async def _send_group_dm_async(
+        self,
+        user_ids: Tuple[str, str],
+        message: str,
+        semaphore: asyncio.Semaphore
+    ) -> None:
+        """Send a group DM to a pair of users with the async client.
 
         Args:
             user_ids: Tuple of two user IDs.
             message: Message text.
-
-        Returns:
-            True if successful.
+            semaphore: Semaphore bounding concurrent requests.
 
         Raises:
             SlackClientError: If DM fails to send.
         """
-        try:
-            mpim = self.client.conversations_open(users=user_ids)
-            self.post_message(message, mpim["channel"]["id"])
-            time.sleep(MPIM_DELAY)
-            return True
-        except SlackApiError as e:
-            raise SlackClientError(f"Error sending group DM to {user_ids}: {e}")
+        async with semaphore:
+            try:
+                mpim = await self.aclient.conversations_open(users=user_ids)
+                response = await self.aclient.chat_postMessage(channel=mpim["channel"]["id"], text=message)
+                if not response.get('ok', False):
+                    raise SlackClientError(f"Message not OK: {response}")
+            except SlackApiError as e:
+                raise SlackClientError(f"Error sending group DM to {user_ids}: {e}")
+
+    def send_group_dms(self, dms: List[Tuple[Tuple[str, str], str]]) -> List[Optional[Exception]]:
+        """Send group DMs to several pairs of users concurrently.
+
+        Rate limited requests are retried by the async client using Slack's
+        Retry-After header.
+
+        Args:
+            dms: List of (user_ids, message) tuples.
+
+        Returns:
+            List with None for each DM sent, or the exception raised, in input order.
+        """
+        async def send_all() -> List[Optional[Exception]]:
+            semaphore = asyncio.Semaphore(GROUP_DM_CONCURRENCY)
+            return await asyncio.gather(
+                *(self._send_group_dm_async(user_ids, message, semaphore) for user_ids, message in dms),
+                return_exceptions=True
+            )
+
+        return asyncio.run(send_all())
@@ -0,0 +1,7 @@
+import sys
+import pathlib
+
+# Make the src modules importable once per test session
+src_path = str(pathlib.Path(__file__).resolve().parent.parent / 'src')
+if src_path not in sys.path:
+    sys.path.insert(0, src_path)
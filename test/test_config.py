@@ -0,0 +1,108 @@
+import pytest
+
+import config
+from config import Config, ConfigurationError
+
+
+_ENV = {
+    'SLACK_API_TOKEN': 'xoxb-test',
+    'CHANNEL_NAME': 'coffee',
+    'LOOKBACK_DAYS': '30',
+    'MAGICAL_TEXT': 'New pairs',
+}
+
+
+@pytest.fixture
+def load_env():
+    config._load_env.cache_clear()
+    yield config._load_env
+    config._load_env.cache_clear()
+
+
+@pytest.mark.parametrize('field, name', [
+    ('slack_token', 'SLACK_API_TOKEN'),
+    ('channel_name', 'CHANNEL_NAME'),
+    ('lookback_days', 'LOOKBACK_DAYS'),
+    ('magical_text', 'MAGICAL_TEXT'),
+])
+def test_required_field_fails_on_access(field, name):
+    env = {key: value for key, value in _ENV.items() if key != name}
+    cfg = Config(env=env)
+
+    # Other fields are still readable
+    for other in Config._FIELDS:
+        if other != field:
+            getattr(cfg, other)
+
+    with pytest.raises(ConfigurationError, match=name):
+        getattr(cfg, field)
+    with pytest.raises(ConfigurationError, match=name):
+        cfg.validate()
+
+
+def test_optional_fields_default():
+    cfg = Config(env=_ENV).validate()
+
+    assert cfg.private_channel_name == 'randomcoffebotprivatechannelformemory'
+    assert cfg.pairs_are_public is False
+    assert cfg.chan_names_are_ids is False
+    assert cfg.lookback_days == 30
+    assert Config(env={**_ENV, 'PAIRS_ARE_PUBLIC': 'yes'}).pairs_are_public is True
+
+
+@pytest.mark.parametrize('lookback_days', ['0', '-1', 'two'])
+def test_validate_rejects_invalid_lookback_days(lookback_days):
+    cfg = Config(env={**_ENV, 'LOOKBACK_DAYS': lookback_days})
+
+    with pytest.raises(ConfigurationError, match='LOOKBACK_DAYS must be a positive integer'):
+        cfg.validate()
+
+
+def test_values_take_precedence_over_env():
+    cfg = Config(env=_ENV, slack_token='xoxb-other', lookback_days=7)
+
+    assert cfg.slack_token == 'xoxb-other'
+    assert cfg.lookback_days == 7
+    assert cfg.channel_name == 'coffee'
+
+
+def test_unknown_field():
+    with pytest.raises(ConfigurationError, match='slack_tokn'):
+        Config(slack_tokn='xoxb-test')
+
+
+def test_positional_values_eq_and_repr():
+    cfg = Config('xoxb-test', 'coffee', 'coffee-pairs', False, False, 30, 'New pairs')
+
+    assert cfg == Config(
+        slack_token='xoxb-test',
+        channel_name='coffee',
+        private_channel_name='coffee-pairs',
+        pairs_are_public=False,
+        chan_names_are_ids=False,
+        lookback_days=30,
+        magical_text='New pairs'
+    )
+    assert cfg == Config(env={**_ENV, 'PRIVATE_CHANNEL_NAME_FOR_MEMORY': 'coffee-pairs'})
+    assert cfg != Config(env={**_ENV, 'PRIVATE_CHANNEL_NAME_FOR_MEMORY': 'coffee-pairs'}, lookback_days=7)
+    assert repr(cfg).startswith("Config(slack_token='xoxb-test', channel_name='coffee', ")
+
+    with pytest.raises(TypeError):
+        Config(*range(len(Config._FIELDS) + 1))
+    with pytest.raises(TypeError):
+        Config('xoxb-test', slack_token='xoxb-other')
+
+
+def test_load_env_prefers_process_environment(load_env, monkeypatch, tmp_path):
+    dotenv_path = tmp_path / '.env'
+    dotenv_path.write_text('CHANNEL_NAME=from-dotenv\nMAGICAL_TEXT=from-dotenv\n')
+    monkeypatch.setattr(config, 'find_dotenv', lambda: str(dotenv_path))
+    monkeypatch.delenv('MAGICAL_TEXT', raising=False)
+    monkeypatch.setenv('CHANNEL_NAME', 'from-environ')
+
+    env = load_env()
+
+    assert env['CHANNEL_NAME'] == 'from-environ'
+    assert env['MAGICAL_TEXT'] == 'from-dotenv'
+    # Parsed once per process
+    assert load_env() is env
@@ -0,0 +1,87 @@
+import json
+from unittest import mock
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from config import Config
+from main import run_random_coffee
+from slack_client import SlackClient, ChannelNotFoundError
+
+
+@pytest.fixture
+def config():
+    return Config(
+        slack_token='xoxb-test',
+        channel_name='coffee',
+        private_channel_name='coffee-pairs',
+        pairs_are_public=True,
+        chan_names_are_ids=False,
+        lookback_days=30,
+        magical_text='New pairs'
+    )
+
+
+@pytest.fixture
+def slack(tmp_path):
+    """Mocked sync and async Slack clients, with a disk cache holding a stale channel ID."""
+    cache_path = str(tmp_path / 'pyslackrandomcoffee.json')
+    SlackClient('xoxb-test', cache_path=cache_path)._update_cache(
+        bot_user_id='UBOT',
+        channels={'coffee': 'COLD'}
+    )
+
+    def conversations_members(channel, **kwargs):
+        if channel == 'COLD':
+            raise SlackApiError('failed', {'ok': False, 'error': 'channel_not_found'})
+        return {'members': ['U1', 'U2'], 'response_metadata': {'next_cursor': ''}}
+
+    with mock.patch('slack_client.WebClient') as web_client, \
+            mock.patch('slack_client.AsyncWebClient') as async_web_client:
+        async_web_client.return_value = aclient = mock.AsyncMock()
+        aclient.conversations_members.side_effect = SlackApiError('failed', {'ok': False, 'error': 'channel_not_found'})
+        aclient.auth_test.return_value = {'user_id': 'UBOT'}
+        aclient.conversations_list.return_value = {
+            'channels': [{'name': 'coffee', 'id': 'COLD'}],
+            'response_metadata': {'next_cursor': ''}
+        }
+        aclient.users_list.return_value = {'members': [{'id': 'U1'}, {'id': 'U2'}]}
+        aclient.conversations_open.return_value = {'channel': {'id': 'D1'}}
+        aclient.chat_postMessage.return_value = {'ok': True}
+
+        client = web_client.return_value
+        client.conversations_members.side_effect = conversations_members
+        client.conversations_list.return_value = {
+            'channels': [{'name': 'coffee', 'id': 'CNEW'}],
+            'response_metadata': {'next_cursor': ''}
+        }
+        client.conversations_history.return_value = {'messages': [], 'has_more': False}
+        client.chat_postMessage.return_value = {'ok': True}
+
+        yield client, aclient, cache_path
+
+
+def test_stale_cached_channel_is_resolved_again(config, slack):
+    client, _, cache_path = slack
+
+    run_random_coffee(config, cache_path=cache_path)
+
+    assert [call.kwargs['channel'] for call in client.conversations_members.call_args_list] == ['COLD', 'CNEW']
+    client.conversations_list.assert_called_once()
+    assert client.conversations_history.call_args.kwargs['channel'] == 'CNEW'
+    assert client.chat_postMessage.call_args.kwargs['channel'] == 'CNEW'
+    with open(cache_path) as f:
+        assert list(json.load(f).values())[0]['channels'] == {'coffee': 'CNEW'}
+
+
+def test_unknown_channel_is_not_retried(config, slack):
+    client, aclient, _ = slack
+
+    # Without the disk cache the ID is freshly listed, so it isn't resolved again
+    with pytest.raises(ChannelNotFoundError):
+        run_random_coffee(config, cache_path=None)
+
+    aclient.conversations_list.assert_called_once()
+    client.conversations_list.assert_not_called()
+    client.conversations_members.assert_called_once()
+    client.chat_postMessage.assert_not_called()
@@ -1,55 +1,122 @@
 #!/usr/bin/env python
-"""Tests for pairing module."""
+"""Tests for pairing module.
+
+Run with pytest, or standalone with src on the path:
+
+    PYTHONPATH=src python test/test_pairing.py
+"""
 
 import sys
-import os
+import itertools
 from collections import Counter
+from unittest import mock
+
+import pytest
 
-# Add src to path
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+import pairing
+from pairing import (
+    generate_pairs,
+    count_previous_matches,
+    iter_previous_pairs_from_metadata,
+    parse_previous_pairs_from_metadata,
+    pairs_to_metadata,
+    send_pair_notifications,
+    PairingError
+)
 
-from pairing import generate_pairs, parse_previous_pairs_from_metadata, pairs_to_metadata
 
+_MEMBERS_UNEVEN = ('Liam', 'Olivia', 'Noah', 'Emma', 'Ava')
+_MEMBERS_EVEN = ('Liam', 'Olivia', 'Noah', 'Emma', 'Ava', 'Sophia')
+_MEMBERS_UNEVEN_WITHOUT_NOAH = ('Liam', 'Olivia', 'Emma', 'Ava', 'Sophia')
+_MEMBERS_SINGLE = ('Liam',)
+_MEMBERS_EMPTY = ()
+_PREVIOUS_PAIRS = ((('Olivia', 'Noah'), ('Olivia', 'Ava')),)
 
-def test_generate_pairs():
+
+_GENERATE_PAIRS_CASES = [
+    # Uneven number of members
+    (_MEMBERS_UNEVEN, 3, 2, None),
+    # Even number of members
+    (_MEMBERS_EVEN, 3, 1, None),
+    # A single member pair with one-self
+    (_MEMBERS_SINGLE, 1, 2, None),
+    # No members found
+    (_MEMBERS_EMPTY, 0, 0, None),
+    # Even with previous matches
+    (_MEMBERS_EVEN, 3, 1, _PREVIOUS_PAIRS),
+    # Uneven with previous matches
+    (_MEMBERS_UNEVEN_WITHOUT_NOAH, 3, 2, _PREVIOUS_PAIRS),
+]
+
+
+@pytest.mark.parametrize(
+    "members,number_of_pairs,expected_max_occurrences,previous_pairs",
+    _GENERATE_PAIRS_CASES,
+    ids=['uneven', 'even', 'single', 'empty', 'even_with_history', 'uneven_with_history']
+)
+def test_generate_pairs(members, number_of_pairs, expected_max_occurrences, previous_pairs):
     """Test pair generation with various scenarios."""
+    pairs = generate_pairs(list(members), previous_pairs)
 
-    def helper(members, number_of_pairs, expected_max_occurrences, previous_pairs):
-        pairs = generate_pairs(members.copy(), previous_pairs)
-        unpacked_members = [name for pair in pairs for name in pair]
+    # Count the occurrences of names across all pairs in a single pass
+    occurrences = Counter(itertools.chain.from_iterable(pairs))
 
-        # Ensure all member names are used in the pairs
-        assert set(unpacked_members) == set(members), f"Not all members used: {unpacked_members} vs {members}"
+    # Ensure all member names are used in the pairs
+    assert occurrences.keys() == set(members)
 
-        # Ensure that we get the correct number of pairs
-        assert len(pairs) == number_of_pairs, f"Expected {number_of_pairs} pairs, got {len(pairs)}"
+    # Ensure that we get the correct number of pairs
+    assert len(pairs) == number_of_pairs
 
-        # Count the occurrences of names in the unpacked_members list
-        if expected_max_occurrences:
-            counter = Counter(unpacked_members)
-            max_occurrences = max(list(counter.values()))
-            assert max_occurrences == expected_max_occurrences, \
-                f"Expected max {expected_max_occurrences} occurrences, got {max_occurrences}"
+    if expected_max_occurrences:
+        max_occurrences = max(occurrences.values(), default=0)
+        assert max_occurrences == expected_max_occurrences
 
-    # Uneven number of members
-    helper(['Liam', 'Olivia', 'Noah', 'Emma', 'Ava'], 3, 2, None)
 
-    # Even number of members
-    helper(['Liam', 'Olivia', 'Noah', 'Emma', 'Ava', 'Sophia'], 3, 1, None)
+def test_generate_pairs_large_channel_is_greedy(monkeypatch):
+    """Test channels above MATCHING_MAX_MEMBERS skip the optimal matching."""
+    def fail_matching(graph):
+        raise AssertionError("min_weight_matching used for a large channel")
 
-    # A single member pair with one-self
-    helper(['Liam'], 1, 2, None)
+    monkeypatch.setattr(pairing.nx, 'min_weight_matching', fail_matching)
 
-    # No members found
-    helper([], 0, 0, None)
+    members = [f'U{i}' for i in range(2 * pairing.MATCHING_MAX_MEMBERS + 1)]
+    previous_pairs = [[(members[i], members[i + 1]) for i in range(0, len(members) - 1, 2)]]
 
-    # Even with previous matches
-    helper(['Liam', 'Olivia', 'Noah', 'Emma', 'Ava', 'Sophia'], 3, 1,
-           [[('Olivia', 'Noah'), ('Olivia', 'Ava')]])
+    pairs = generate_pairs(members, previous_pairs)
 
-    # Uneven with previous matches
-    helper(['Liam', 'Olivia', 'Emma', 'Ava', 'Sophia'], 3, 2,
-           [[('Olivia', 'Noah'), ('Olivia', 'Ava')]])
+    occurrences = Counter(itertools.chain.from_iterable(pairs))
+    assert occurrences.keys() == set(members)
+    assert len(pairs) == len(members) // 2 + 1
+    assert max(occurrences.values()) == 2
+    # Only the last normal pair and the odd pair can be forced into a repeat
+    previous = {frozenset(pair) for pair in previous_pairs[0]}
+    repeats = [pair for pair in pairs if frozenset(pair) in previous]
+    assert len(repeats) <= 2
+
+
+def test_count_previous_matches():
+    """Test previous matches are counted for both members of a pair."""
+    previous_pairs = [
+        [('U1', 'U2'), ('U3', 'U4')],
+        [('U2', 'U1'), ('U1', 'U3')]
+    ]
+
+    counts = count_previous_matches(previous_pairs)
+
+    assert counts['U1'] == {'U2': 2, 'U3': 1}
+    assert counts['U2'] == {'U1': 2}
+    assert counts['U4'] == {'U3': 1}
+    assert not count_previous_matches(None)
+
+
+def test_generate_pairs_avoids_repeats():
+    """Test pairing finds the pairing without repeats whenever one exists."""
+    members = ['U1', 'U2', 'U3', 'U4']
+    previous_pairs = [[('U1', 'U2'), ('U3', 'U4')], [('U1', 'U3'), ('U2', 'U4')]]
+
+    for _ in range(20):
+        pairs = generate_pairs(members, previous_pairs)
+        assert {frozenset(pair) for pair in pairs} == {frozenset(('U1', 'U4')), frozenset(('U2', 'U3'))}
 
 
 def test_metadata_roundtrip():
@@ -113,6 +180,19 @@ def test_parse_multiple_history():
     assert parsed[1] == [('U1', 'U3'), ('U2', 'U4')]
 
 
+def test_iter_previous_pairs_streams_into_counts():
+    """Test history can be streamed from a generator into match counts."""
+    messages = (
+        {'metadata': {'event_type': 'random_coffee_pairs',
+                      'event_payload': {'pairs': [{'user1': f'U{i}', 'user2': 'U0'}]}}}
+        for i in range(1, 4)
+    )
+
+    counts = count_previous_matches(iter_previous_pairs_from_metadata(messages))
+
+    assert counts['U0'] == {'U1': 1, 'U2': 1, 'U3': 1}
+
+
 def test_parse_no_metadata():
     """Test parsing when no metadata exists."""
     messages = [
@@ -124,9 +204,28 @@ def test_parse_no_metadata():
     assert parsed is None
 
 
+def test_send_pair_notifications():
+    """Test notifications are sent to every pair and partial failures don't raise."""
+    pairs = [('U1', 'U2'), ('U3', 'U4'), ('U5', 'U1')]
+    slack_client = mock.Mock()
+    slack_client.send_group_dms.return_value = [None, RuntimeError('failed'), None]
+
+    send_pair_notifications(pairs, 'C1', slack_client)
+
+    dms = slack_client.send_group_dms.call_args.args[0]
+    assert [user_ids for user_ids, _ in dms] == pairs
+    assert all('<#C1>' in message for _, message in dms)
+
+
+def test_send_pair_notifications_all_failed():
+    """Test PairingError is raised only when every notification fails."""
+    pairs = [('U1', 'U2'), ('U3', 'U4')]
+    slack_client = mock.Mock()
+    slack_client.send_group_dms.return_value = [RuntimeError('failed'), RuntimeError('failed')]
+
+    with pytest.raises(PairingError):
+        send_pair_notifications(pairs, 'C1', slack_client)
+
+
 if __name__ == '__main__':
-    test_generate_pairs()
-    test_metadata_roundtrip()
-    test_parse_multiple_history()
-    test_parse_no_metadata()
-    print("All tests passed!")
+    sys.exit(pytest.main([__file__]))
@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 
+import itertools
 import src.pyslackrandomcoffee
 from collections import Counter
 
@@ -9,18 +10,17 @@ def test_generate_pairs():
     def helper(members, number_of_pairs, expected_max_occurrences, previous_pairs):
 
         pairs = src.pyslackrandomcoffee.generate_pairs(members.copy(), previous_pairs)
-        unpacked_members = [name for pair in pairs for name in pair]
 
         # Ensure all member names are used in the pairs
-        assert set(unpacked_members) == set(members)
+        assert set(itertools.chain.from_iterable(pairs)) == set(members)
 
         # Ensure that we get the correct number of pairs
         assert len(pairs) == number_of_pairs
 
-        # Count the occurrences of names in the unpacked_members list
+        # Count the occurrences of names across the pairs
         if expected_max_occurrences:
-            counter = Counter(unpacked_members)
-            max_occurrences = max(list(counter.values()))
+            counter = Counter(itertools.chain.from_iterable(pairs))
+            max_occurrences = max(counter.values())
             assert max_occurrences == expected_max_occurrences
 
     # Uneven number of members
@@ -0,0 +1,304 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from slack_sdk.errors import SlackApiError
+
+from slack_client import SlackClient, SlackClientError, ChannelNotFoundError
+
+
+_CHANNELS_PAGE = {
+    'channels': [{'name': 'coffee', 'id': 'C1'}, {'name': 'coffee-pairs', 'id': 'C2'}],
+    'response_metadata': {'next_cursor': ''}
+}
+
+
+@pytest.fixture
+def async_web_client():
+    with mock.patch('slack_client.AsyncWebClient') as async_web_client:
+        async_web_client.return_value = mock.AsyncMock()
+        yield async_web_client
+
+
+@pytest.fixture
+def web_client(async_web_client):
+    with mock.patch('slack_client.WebClient') as web_client:
+        yield web_client
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'cache' / 'pyslackrandomcoffee.json')
+
+
+def make_client(cache_path, token='xoxb-test'):
+    return SlackClient(token, cache_path=cache_path)
+
+
+def test_cache_merges_updates(web_client, cache_path):
+    client = make_client(cache_path)
+    client._update_cache(bot_user_id='UBOT')
+    client._update_cache(channels={'coffee': 'C1'})
+    client._update_cache(channels={'coffee-pairs': 'C2'})
+
+    assert make_client(cache_path)._load_cache() == {
+        'bot_user_id': 'UBOT',
+        'channels': {'coffee': 'C1', 'coffee-pairs': 'C2'}
+    }
+    # Entries are per token
+    assert make_client(cache_path, token='xoxb-other')._load_cache() == {}
+
+
+@pytest.mark.parametrize('content', ['not json', '[]', '"string"'], ids=['invalid', 'list', 'string'])
+def test_cache_ignores_corrupt_file(web_client, cache_path, content):
+    client = make_client(cache_path)
+    client._update_cache(bot_user_id='UBOT')
+    with open(cache_path, 'w') as f:
+        f.write(content)
+
+    assert client._load_cache() == {}
+
+    client._update_cache(bot_user_id='UBOT')
+    assert client._load_cache() == {'bot_user_id': 'UBOT'}
+
+
+def test_cache_disabled(web_client, tmp_path):
+    web_client.return_value.auth_test.return_value = {'user_id': 'UBOT'}
+
+    client = make_client(None)
+    client._update_cache(bot_user_id='UBOT')
+    assert client._load_cache() == {}
+    assert make_client(None).get_bot_user_id() == 'UBOT'
+
+    assert web_client.return_value.auth_test.call_count == 1
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_get_channels_id_uses_disk_cache(web_client, cache_path):
+    conversations_list = web_client.return_value.conversations_list
+    conversations_list.return_value = _CHANNELS_PAGE
+
+    expected = {'coffee': 'C1', 'coffee-pairs': 'C2'}
+    assert make_client(cache_path).get_channels_id(['coffee', 'coffee-pairs'], False) == expected
+    assert make_client(cache_path).get_channels_id(['coffee', 'coffee-pairs'], False) == expected
+
+    assert conversations_list.call_count == 1
+
+
+def test_get_channels_id_memoizes_per_client(web_client, cache_path):
+    conversations_list = web_client.return_value.conversations_list
+    conversations_list.return_value = _CHANNELS_PAGE
+    client = make_client(cache_path)
+
+    channel_ids = client.get_channels_id(['coffee', 'coffee-pairs'], False)
+    channel_ids['coffee'] = 'CX'
+
+    # Served from memory: no disk read, no listing, and unaffected by the caller's mutation
+    with mock.patch.object(client, '_load_cache') as load_cache:
+        assert client.get_channels_id(['coffee-pairs', 'coffee'], False) == {'coffee': 'C1', 'coffee-pairs': 'C2'}
+    load_cache.assert_not_called()
+    assert conversations_list.call_count == 1
+
+
+def test_forget_cached_channels(web_client, cache_path):
+    conversations_list = web_client.return_value.conversations_list
+    conversations_list.return_value = _CHANNELS_PAGE
+
+    # Freshly listed IDs aren't stale
+    client = make_client(cache_path)
+    client.get_channels_id(['coffee', 'coffee-pairs'], False)
+    assert not client.forget_cached_channels(['coffee', 'coffee-pairs'])
+
+    client = make_client(cache_path)
+    client.get_channels_id(['coffee', 'coffee-pairs'], False)
+    assert conversations_list.call_count == 1
+
+    assert client.forget_cached_channels(['coffee'])
+    assert client._load_cache()['channels'] == {'coffee-pairs': 'C2'}
+
+    # The forgotten channel is listed again
+    client.get_channels_id(['coffee', 'coffee-pairs'], False)
+    assert conversations_list.call_count == 2
+
+
+@pytest.mark.parametrize('error, raised', [
+    ('channel_not_found', ChannelNotFoundError),
+    ('not_in_channel', ChannelNotFoundError),
+    ('ratelimited', SlackClientError),
+])
+def test_channel_errors(web_client, cache_path, error, raised):
+    web_client.return_value.conversations_members.side_effect = SlackApiError('failed', {'ok': False, 'error': error})
+    web_client.return_value.conversations_history.side_effect = SlackApiError('failed', {'ok': False, 'error': error})
+    client = make_client(cache_path)
+
+    with pytest.raises(SlackClientError) as members_error:
+        client.get_members_list('C1')
+    with pytest.raises(SlackClientError) as history_error:
+        client.get_conversation_history('C1', 0, 1)
+
+    assert type(members_error.value) is raised
+    assert type(history_error.value) is raised
+
+
+def _page(key, items, next_cursor=''):
+    return {key: items, 'response_metadata': {'next_cursor': next_cursor}}
+
+
+def test_warmup_prefetches_first_pages(web_client, async_web_client, cache_path):
+    aclient = async_web_client.return_value
+    aclient.auth_test.return_value = {'user_id': 'UBOT'}
+    aclient.conversations_list.return_value = _page('channels', [{'name': 'other', 'id': 'C0'}], 'c2')
+    aclient.users_list.return_value = _page('members', [{'id': 'U1'}, {'id': 'UBOT', 'is_bot': True}])
+    sync = web_client.return_value
+    sync.conversations_list.return_value = _page('channels', [{'name': 'coffee', 'id': 'C1'}])
+    sync.conversations_members.return_value = _page('members', ['U1', 'UBOT'])
+
+    client = make_client(cache_path)
+    client.warmup(['coffee'], False, 'coffee')
+
+    assert client.get_bot_user_id() == 'UBOT'
+    assert client.get_channels_id(['coffee'], False) == {'coffee': 'C1'}
+    assert client.get_members_list('C1') == ['U1']
+
+    # Only the pages after the prefetched ones are requested synchronously
+    sync.auth_test.assert_not_called()
+    sync.users_list.assert_not_called()
+    sync.conversations_list.assert_called_once()
+    assert sync.conversations_list.call_args.kwargs['cursor'] == 'c2'
+    # The members channel ID wasn't cached, so its first page wasn't prefetched
+    aclient.conversations_members.assert_not_called()
+    sync.conversations_members.assert_called_once()
+
+
+def test_warmup_prefetches_members_of_cached_channel(web_client, async_web_client, cache_path):
+    make_client(cache_path)._update_cache(bot_user_id='UBOT', channels={'coffee': 'C1'})
+    aclient = async_web_client.return_value
+    aclient.conversations_members.return_value = _page('members', ['U1', 'U2'], 'm2')
+    aclient.users_list.return_value = _page('members', [])
+    sync = web_client.return_value
+    sync.conversations_members.return_value = _page('members', ['U3'])
+
+    client = make_client(cache_path)
+    client.warmup(['coffee'], False, 'coffee')
+
+    aclient.auth_test.assert_not_called()
+    aclient.conversations_list.assert_not_called()
+    aclient.conversations_members.assert_called_once()
+    assert aclient.conversations_members.call_args.kwargs['channel'] == 'C1'
+
+    # A page prefetched for another channel isn't reused
+    assert client.get_members_list('C2') == ['U3']
+    assert sync.conversations_members.call_args.kwargs['cursor'] is None
+
+    assert client.get_members_list('C1') == ['U1', 'U2', 'U3']
+    assert sync.conversations_members.call_args.kwargs['cursor'] == 'm2'
+
+    # The prefetched page is used once
+    assert client.get_members_list('C1') == ['U3']
+    assert sync.conversations_members.call_count == 3
+    assert sync.conversations_members.call_args.kwargs['cursor'] is None
+
+
+def test_warmup_failures_fall_back_to_sync_calls(web_client, async_web_client, cache_path):
+    aclient = async_web_client.return_value
+    aclient.auth_test.side_effect = SlackApiError('failed', {'ok': False, 'error': 'ratelimited'})
+    aclient.conversations_list.side_effect = SlackApiError('failed', {'ok': False, 'error': 'ratelimited'})
+    aclient.users_list.side_effect = OSError('connection reset')
+    sync = web_client.return_value
+    sync.auth_test.return_value = {'user_id': 'UBOT'}
+    sync.conversations_list.return_value = _page('channels', [{'name': 'coffee', 'id': 'C1'}])
+    sync.conversations_members.return_value = _page('members', ['U1'])
+    sync.users_list.return_value = _page('members', [{'id': 'U1'}])
+
+    client = make_client(cache_path)
+    client.warmup(['coffee'], False, 'coffee')
+
+    assert client.get_bot_user_id() == 'UBOT'
+    assert client.get_channels_id(['coffee'], False) == {'coffee': 'C1'}
+    assert client.get_members_list('C1') == ['U1']
+    sync.auth_test.assert_called_once()
+    sync.conversations_list.assert_called_once()
+    sync.users_list.assert_called_once()
+
+
+def _history_page(users, next_cursor=None):
+    page = {'messages': [{'user': user, 'ts': str(i)} for i, user in enumerate(users)], 'has_more': bool(next_cursor)}
+    if next_cursor:
+        page['response_metadata'] = {'next_cursor': next_cursor}
+    return page
+
+
+def test_iter_bot_messages_stops_paging_at_max_messages(web_client, cache_path):
+    conversations_history = web_client.return_value.conversations_history
+    conversations_history.side_effect = [
+        _history_page(['UBOT', 'U1', 'UBOT'], 'h2'),
+        _history_page(['U2', 'UBOT', 'UBOT'], 'h3'),
+        _history_page(['UBOT']),
+    ]
+    client = make_client(cache_path)
+
+    messages = list(client.iter_bot_messages('C1', 0, 1, bot_user_id='UBOT', max_messages=3))
+
+    assert [message['user'] for message in messages] == ['UBOT'] * 3
+    # The third page is never requested
+    assert conversations_history.call_count == 2
+    assert [call.kwargs['cursor'] for call in conversations_history.call_args_list] == [None, 'h2']
+    # Pages aren't shrunk when filtering by user
+    assert conversations_history.call_args.kwargs['limit'] == 200
+
+
+def test_iter_bot_messages_pages_lazily(web_client, cache_path):
+    conversations_history = web_client.return_value.conversations_history
+    conversations_history.side_effect = [
+        _history_page(['UBOT'], 'h2'),
+        _history_page(['U1', 'UBOT']),
+    ]
+    client = make_client(cache_path)
+
+    messages = client.iter_bot_messages('C1', 0, 1, bot_user_id='UBOT')
+    conversations_history.assert_not_called()
+
+    next(messages)
+    assert conversations_history.call_count == 1
+    assert len(list(messages)) == 1
+    assert conversations_history.call_count == 2
+
+
+def test_send_group_dms(web_client, async_web_client, cache_path):
+    aclient = async_web_client.return_value
+
+    async def conversations_open(users):
+        # Later pairs finish first, results must still follow the input order
+        await asyncio.sleep(0.01 * (3 - int(users[0][1:])))
+        return {'channel': {'id': f'D{users[0]}'}}
+
+    async def chat_post_message(channel, text):
+        if channel == 'DU2':
+            raise SlackApiError('failed', {'ok': False, 'error': 'cannot_dm_bot'})
+        return {'ok': True}
+
+    aclient.conversations_open.side_effect = conversations_open
+    aclient.chat_postMessage.side_effect = chat_post_message
+
+    results = make_client(cache_path).send_group_dms([
+        (('U1', 'U4'), 'Hello 1'),
+        (('U2', 'U5'), 'Hello 2'),
+        (('U3', 'U6'), 'Hello 3'),
+    ])
+
+    assert results[0] is None
+    assert isinstance(results[1], SlackClientError)
+    assert results[2] is None
+    # The failing pair doesn't cancel the others
+    assert sorted(call.kwargs['channel'] for call in aclient.chat_postMessage.call_args_list) == ['DU1', 'DU2', 'DU3']
+
+
+def test_send_group_dms_rejects_not_ok(web_client, async_web_client, cache_path):
+    aclient = async_web_client.return_value
+    aclient.conversations_open.return_value = {'channel': {'id': 'D1'}}
+    aclient.chat_postMessage.return_value = {'ok': False}
+
+    results = make_client(cache_path).send_group_dms([(('U1', 'U2'), 'Hello')])
+
+    assert len(results) == 1
+    assert isinstance(results[0], SlackClientError)